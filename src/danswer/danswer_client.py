@@ -15,6 +15,21 @@ class DanswerAPI:
         response.raise_for_status()
         return response.json()
 
+    def post_ingest_document_bytes(self, data: bytes):
+        """
+        Posts a payload that has already been serialized to JSON bytes, skipping re-encoding.
+
+        Parameters:
+        data (bytes): The serialized ingestion payload.
+
+        Returns:
+        dict: The decoded response of the ingestion endpoint.
+        """
+        url = f"{self.base_url}/danswer-api/ingestion"
+        response = requests.post(url, headers=self.headers, data=data)
+        response.raise_for_status()
+        return response.json()
+
     def get_info(self):
         return {
             "base_url": self.base_url
@@ -37,15 +37,17 @@ class DanswerIngestionPayloadBuilder:
         Returns the payload in the specified format.
 
         Args:
-            astype (str): The format of the payload. Defaults to 'dict'. Options are 'dict' and 'json'.
+            astype (str): The format of the payload. Defaults to 'dict'. Options are 'dict', 'json' and 'bytes'.
 
         Returns:
-            dict or str: The payload in the specified format.
+            dict, str or bytes: The payload in the specified format.
         """
         if astype == 'dict':
             return self.payload
         elif astype == 'json':
             return json.dumps(self.payload)
+        elif astype == 'bytes':
+            return json.dumps(self.payload).encode('utf-8')
         return self.payload
 
     def build_payload(self, id, sections, source, semantic_identifier, update, metadata=None, cc_pair_id=0):
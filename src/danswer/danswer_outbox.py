@@ -0,0 +1,215 @@
+# Durable outbox for Danswer ingestion payloads
+import fcntl
+import os
+import re
+from pathlib import Path
+
+
+class DanswerOutboxLockedError(RuntimeError):
+    pass
+
+
+class DanswerOutbox:
+    """
+    Append-only, on-disk spool of serialized Danswer ingestion payloads.
+
+    Payloads are appended to segment files as single lines of the form
+    ``<seq>\\t<issue_key>\\t<payload json>``. Appends are buffered and become
+    durable on flush(). Delivered records are recorded in a separate
+    acknowledgement log, so a crash after a flush only ever causes a record to be
+    sent again, never lost. Segments whose records are all acknowledged are
+    removed by compact().
+
+    The outbox directory is locked exclusively for the lifetime of the process,
+    so that concurrent runs cannot assign the same sequence numbers.
+    """
+
+    SEGMENT_PATTERN = re.compile(r'^segment-(\d+)\.log$')
+    ACK_FILE_NAME = 'acks.log'
+    LOCK_FILE_NAME = 'outbox.lock'
+
+    def __init__(self, path, segment_max_bytes=16 * 1024 * 1024):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.segment_max_bytes = segment_max_bytes
+        self._lock()
+        self.ack_path = self.path / self.ACK_FILE_NAME
+        self.acked = set()
+        self.next_seq = 0
+        self._active = None
+        self._active_size = 0
+        self._recover()
+
+    def _lock(self):
+        """
+        Takes an exclusive lock on the outbox directory. The lock is released when the process exits.
+        """
+        self._lock_file = open(self.path / self.LOCK_FILE_NAME, 'a')
+        try:
+            fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            self._lock_file.close()
+            raise DanswerOutboxLockedError(f'Danswer outbox {self.path} is in use by another process')
+
+    def _segment_path(self, first_seq):
+        return self.path / f'segment-{first_seq:012d}.log'
+
+    def _segments(self):
+        """
+        Returns the segment files sorted by the sequence number of their first record.
+        """
+        segments = []
+        for item in self.path.iterdir():
+            match = self.SEGMENT_PATTERN.match(item.name)
+            if match:
+                segments.append((int(match.group(1)), item))
+        return [item for _, item in sorted(segments)]
+
+    @staticmethod
+    def _truncate_partial_tail(file_path):
+        """
+        Cuts off a trailing record that was only partially written before a crash.
+        """
+        with open(file_path, 'rb+') as f:
+            data = f.read()
+            if data and not data.endswith(b'\n'):
+                f.truncate(data.rfind(b'\n') + 1)
+
+    def _recover(self):
+        if self.ack_path.exists():
+            self._truncate_partial_tail(self.ack_path)
+            with open(self.ack_path, 'rb') as f:
+                self.acked = {int(line) for line in f if line.strip()}
+
+        segments = self._segments()
+        if segments:
+            self._truncate_partial_tail(segments[-1])
+        for segment in segments:
+            # A segment left empty by a crash still records the sequence number it was created for
+            first_seq = int(self.SEGMENT_PATTERN.match(segment.name).group(1))
+            self.next_seq = max(self.next_seq, first_seq)
+            for seq, _, _ in self._read_segment(segment):
+                self.next_seq = max(self.next_seq, seq + 1)
+
+    @staticmethod
+    def _read_segment(segment):
+        with open(segment, 'rb') as f:
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                seq, issue_key, payload = line.rstrip(b'\n').split(b'\t', 2)
+                yield int(seq), issue_key.decode('utf-8'), payload
+
+    @staticmethod
+    def _append(file_path, data: bytes):
+        with open(file_path, 'ab') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _open_segment(self):
+        """
+        Starts a new active segment for the next sequence number. Records are never appended to a
+        segment left over from a previous run, except an empty one created for the same sequence number.
+        """
+        segment = self._segment_path(self.next_seq)
+        if segment.exists() and segment.stat().st_size > 0:
+            raise RuntimeError(f'Danswer outbox segment {segment} already exists')
+        self._active = open(segment, 'ab')
+        self._active_size = 0
+
+    def enqueue(self, issue_key: str, payload: bytes) -> int:
+        """
+        Appends a serialized payload to the active segment. Records are buffered, call flush()
+        to make them durable.
+
+        Args:
+            issue_key (str): Readable key of the issue, used for logging on delivery.
+            payload (bytes): The payload, already serialized as single-line JSON.
+
+        Returns:
+            int: The sequence number assigned to the record.
+        """
+        if b'\n' in payload:
+            raise ValueError('Outbox payloads must be single-line JSON')
+
+        if self._active is None or self._active_size >= self.segment_max_bytes:
+            self.flush()
+            if self._active is not None:
+                self._active.close()
+            self._open_segment()
+
+        seq = self.next_seq
+        record = b'%d\t%s\t%s\n' % (seq, issue_key.encode('utf-8'), payload)
+        self._active.write(record)
+        self._active_size += len(record)
+        self.next_seq += 1
+        return seq
+
+    def flush(self):
+        """
+        Writes buffered records of the active segment to disk.
+        """
+        if self._active is not None:
+            self._active.flush()
+            os.fsync(self._active.fileno())
+
+    def close(self):
+        """
+        Flushes the active segment and releases the outbox directory lock.
+        """
+        self.flush()
+        if self._active is not None:
+            self._active.close()
+            self._active = None
+        self._lock_file.close()
+
+    def pending(self):
+        """
+        Yields (seq, issue_key, payload) for every record not yet acknowledged, in order.
+        """
+        self.flush()
+        for segment in self._segments():
+            for seq, issue_key, payload in self._read_segment(segment):
+                if seq not in self.acked:
+                    yield seq, issue_key, payload
+
+    def pending_count(self) -> int:
+        return sum(1 for _ in self.pending())
+
+    def ack(self, seq: int):
+        """
+        Marks a record as delivered. Acknowledgements are persisted before returning.
+        """
+        self._append(self.ack_path, b'%d\n' % seq)
+        self.acked.add(seq)
+
+    def compact(self):
+        """
+        Removes fully acknowledged segments and rewrites the acknowledgement log
+        so that it only references records that are still on disk.
+
+        Returns:
+            int: The number of segments removed.
+        """
+        self.flush()
+        segments = self._segments()
+        removed = 0
+        remaining_seqs = set()
+        for index, segment in enumerate(segments):
+            seqs = {seq for seq, _, _ in self._read_segment(segment)}
+            # The active segment is kept so that sequence numbers survive a restart
+            if index < len(segments) - 1 and seqs <= self.acked:
+                segment.unlink()
+                removed += 1
+            else:
+                remaining_seqs |= seqs
+
+        self.acked &= remaining_seqs
+        tmp_path = self.ack_path.with_suffix('.tmp')
+        with open(tmp_path, 'wb') as f:
+            f.write(b''.join(b'%d\n' % seq for seq in sorted(self.acked)))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.ack_path)
+        return removed
@@ -3,26 +3,37 @@ import traceback
 import subprocess
 from pathlib import Path
 
+import requests
+
 from danswer.danswer_content_builder import *
 from danswer.danswer_client import *
+from danswer.danswer_outbox import DanswerOutbox
 from youtrack.youtrack_client import *
 from youtrack.youtrack_util import *
+from youtrack.youtrack_snapshot import YouTrackSnapshot
 from utils import formatter as fmt
 
 
 class YouTrackDanswerIntegration:
     def __init__(self, youtrack_url, youtrack_token, danswer_url=None, danswer_key=None, cc_pair_id: int = None,
-                 config: dict = None, logger=None):
+                 config: dict = None, logger=None, use_outbox: bool = False):
         use_https = config['youtrack'].get('use_https', True)
         verify_ssl = config['youtrack'].get('verify_ssl', True)
 
         self.youtrack_host = youtrack_url
-        self.youtrack_api = YouTrackAPI(youtrack_url, youtrack_token, use_https=use_https, verify_ssl=verify_ssl)
+        self.youtrack_api = YouTrackAPI(youtrack_url, youtrack_token, use_https=use_https, verify_ssl=verify_ssl) \
+            if youtrack_url and youtrack_token else None
         self.danswer_api = DanswerAPI(danswer_url, danswer_key) if danswer_url and danswer_key else None
         self.cc_pair_id = cc_pair_id
         self.logger = logger or logging.getLogger(__name__)
         self.config = config
 
+        outbox_path = config['danswer'].get('outbox_path')
+        self.outbox = DanswerOutbox(
+            Path(outbox_path).expanduser().resolve(),
+            segment_max_bytes=config['danswer'].get('outbox_segment_max_bytes', 16 * 1024 * 1024)
+        ) if use_outbox and self.danswer_api and outbox_path else None
+
     def convert_danswer_api(self, issue) -> DanswerIngestionPayloadBuilder:
         try:
             issue_id = issue['id']
@@ -145,6 +156,11 @@ class YouTrackDanswerIntegration:
             return None
 
     def youtrack_to_danswer_api(self, issues_data):
+        if self.outbox:
+            self.youtrack_to_danswer_outbox(issues_data)
+            self.drain_danswer_outbox()
+            return
+
         self.logger.info(f'Sending {len(issues_data)} YouTrack issues to Danswer API')
         progress = 0
         for issue in issues_data:
@@ -163,6 +179,72 @@ class YouTrackDanswerIntegration:
 
         self.logger.info(f'Completed sending {len(issues_data)} YouTrack items to Danswer API')
 
+    def youtrack_to_danswer_outbox(self, issues_data):
+        """
+        Converts YouTrack issues and spools the serialized payloads to the Danswer outbox.
+
+        Args:
+            issues_data (list): YouTrack issues to convert.
+
+        Returns:
+            int: The number of payloads written to the outbox.
+        """
+        self.logger.info(f'Spooling {len(issues_data)} YouTrack issues to Danswer outbox {self.outbox.path}')
+        spooled = 0
+        try:
+            for issue in issues_data:
+                payload = self.convert_danswer_api(issue)
+                if payload is None:
+                    continue
+                self.outbox.enqueue(issue['idReadable'], payload.get_payload(astype='bytes'))
+                spooled += 1
+        finally:
+            self.outbox.flush()
+
+        self.logger.info(f'Spooled {spooled}/{len(issues_data)} YouTrack issues to Danswer outbox')
+        return spooled
+
+    def drain_danswer_outbox(self):
+        """
+        Sends pending outbox payloads to Danswer API in order, acknowledging each delivered item.
+        Draining stops at the first connection or server error so that the remaining items can be
+        retried on the next run. Items rejected by Danswer as invalid (400/422) are logged and acknowledged,
+        any other error status stops the drain without acknowledging the item.
+
+        Returns:
+            int: The number of items still pending in the outbox.
+        """
+        total = self.outbox.pending_count()
+        self.logger.info(f'Draining {total} pending items from Danswer outbox {self.outbox.path}')
+        progress = 0
+        for seq, issue_key, payload in self.outbox.pending():
+            try:
+                response = self.danswer_api.post_ingest_document_bytes(payload)
+            except requests.HTTPError as e:
+                status = e.response.status_code if e.response is not None else None
+                if status in (400, 422):
+                    self.logger.error(f'Danswer API rejected item {issue_key}, dropping it from the outbox: {e}')
+                    self.outbox.ack(seq)
+                    continue
+                self.logger.error(f'Danswer API failed while sending {issue_key}, stopping drain: {e}')
+                break
+            except requests.RequestException as e:
+                self.logger.error(f'Danswer API unreachable while sending {issue_key}, stopping drain: {e}')
+                break
+
+            self.outbox.ack(seq)
+            progress += 1
+            if isinstance(response, dict) and response.get('already_existed'):
+                self.logger.info(f'Item {issue_key} updated in Danswer ({progress}/{total}).')
+            else:
+                self.logger.info(f'Item {issue_key} added to Danswer ({progress}/{total}).')
+
+        removed = self.outbox.compact()
+        remaining = self.outbox.pending_count()
+        self.logger.info(f'Sent {progress}/{total} items from Danswer outbox, {remaining} pending, '
+                         f'{removed} segments compacted')
+        return remaining
+
     def youtrack_to_danswer_file(self, issues_data, save_path: Path):
         mt_path = (save_path / '.danswer_metadata').with_suffix('.json')
         mt_file = DanswerFileMetadataBuilder(mt_path)
@@ -185,6 +267,33 @@ class YouTrackDanswerIntegration:
         except subprocess.CalledProcessError as e:
             self.logger.error(f'Error zipping files: {e}')
 
+    def youtrack_to_snapshot(self, issues_data, save_path: Path):
+        """
+        Exports YouTrack issues and comments as a Parquet snapshot partitioned by project.
+
+        Args:
+            issues_data (list): YouTrack issues to export.
+            save_path (Path): Directory of the snapshot. Existing snapshot data is replaced.
+        """
+        batch_size = self.config.get('snapshot', {}).get('batch_size', 1000)
+        self.logger.info(f'Exporting {len(issues_data)} YouTrack issues to Parquet snapshot {save_path}')
+        issue_count, comment_count = YouTrackSnapshot(save_path).write(issues_data, batch_size=batch_size)
+        self.logger.info(f'Exported {issue_count} issues and {comment_count} comments to {save_path}')
+
+    def load_snapshot_issues(self, snapshot_path: Path):
+        """
+        Loads YouTrack issues from a Parquet snapshot instead of querying YouTrack.
+
+        Args:
+            snapshot_path (Path): Directory of a snapshot written by youtrack_to_snapshot().
+
+        Returns:
+            list: A list of all issues stored in the snapshot.
+        """
+        issues_data = YouTrackSnapshot(snapshot_path).read()
+        self.logger.info(f'Loaded {len(issues_data)} YouTrack issues from snapshot {snapshot_path}')
+        return issues_data
+
     def fetch_all_youtrack_issues(self, query, fields):
         """
         Fetches all YouTrack issues based on the provided query and fields.
@@ -2,8 +2,10 @@ import argparse
 import logging
 from pathlib import Path
 
+import requests
 import yaml
 
+from danswer.danswer_outbox import DanswerOutboxLockedError
 from integration import YouTrackDanswerIntegration
 
 
@@ -33,56 +35,108 @@ def setup_logging(logger_name: str, config: dict) -> logging.Logger:
 
 def main():
     parser = argparse.ArgumentParser(description='YouTrack | Danswer Integration')
-    parser.add_argument('--youtrack-url', required=True, help='YouTrack base URL')
-    parser.add_argument('--youtrack-token', required=True, help='YouTrack API token')
+    parser.add_argument('--youtrack-url', help='YouTrack base URL')
+    parser.add_argument('--youtrack-token', help='YouTrack API token')
     parser.add_argument('--danswer-url', help='Danswer base URL')
     parser.add_argument('--danswer-key', help='Danswer API key')
-    parser.add_argument('--start-date', required=True, help='Start date for YouTrack issue query (YYYY-MM-DD)')
-    parser.add_argument('--end-date', required=True, help='End date for YouTrack issue query (YYYY-MM-DD)')
-    parser.add_argument('--mode', choices=['api', 'file'], default='file', help='Operation mode: api or file')
-    parser.add_argument('--output-path', help='Output path for file mode')
+    parser.add_argument('--start-date', help='Start date for YouTrack issue query (YYYY-MM-DD)')
+    parser.add_argument('--end-date', help='End date for YouTrack issue query (YYYY-MM-DD)')
+    parser.add_argument('--mode', choices=['api', 'file', 'parquet', 'drain'], default='file',
+                        help='Operation mode: api, file, parquet (export a local snapshot) or drain '
+                             '(resend pending Danswer outbox items)')
+    parser.add_argument('--output-path', help='Output path for file and parquet modes')
+    parser.add_argument('--snapshot-path', help='Read issues from a Parquet snapshot instead of YouTrack in api and '
+                                                'file modes')
     parser.add_argument('--cc-pair-id', help='The “Connector” ID seen on the Connector Status pages. For example, if running locally, it might be http://localhost:3000/admin/connector/2')
 
     args = parser.parse_args()
 
-    if args.mode == 'file' and not args.output_path:
-        parser.error("--output-path is required when mode is 'file'")
+    if args.snapshot_path and args.mode not in ('api', 'file'):
+        parser.error("--snapshot-path can only be used when mode is 'api' or 'file'")
+
+    if args.snapshot_path and (args.start_date or args.end_date):
+        # The snapshot holds the issues of the query it was exported with, it is not filtered again
+        parser.error("--start-date and --end-date cannot be used with --snapshot-path")
+
+    if args.snapshot_path:
+        # Only the YouTrack URL is needed, to generate issue links
+        required_args = ('youtrack_url',)
+    elif args.mode != 'drain':
+        required_args = ('youtrack_url', 'youtrack_token', 'start_date', 'end_date')
+    else:
+        required_args = ()
+    for arg in required_args:
+        if not getattr(args, arg):
+            parser.error(f"--{arg.replace('_', '-')} is required when mode is '{args.mode}'")
+
+    if args.mode in ('api', 'drain') and not (args.danswer_url and args.danswer_key):
+        parser.error(f"--danswer-url and --danswer-key are required when mode is '{args.mode}'")
+
+    if args.mode in ('file', 'parquet') and not args.output_path:
+        parser.error(f"--output-path is required when mode is '{args.mode}'")
 
     if args.mode == 'api' and not args.cc_pair_id:
         parser.error("--cc-pair-id is required when mode is 'api'")
 
     config = load_config('config/config.yaml')
-    integration = YouTrackDanswerIntegration(
-        youtrack_url=args.youtrack_url,
-        youtrack_token=args.youtrack_token,
-        danswer_url=args.danswer_url,
-        danswer_key=args.danswer_key,
-        cc_pair_id=int(args.cc_pair_id) if args.cc_pair_id else None,
-        config=config,
-        logger=logger
-    )
-
-    if not integration.youtrack_api.is_active():
-        logger.error('YouTrack API has not been loaded correctly')
+    try:
+        integration = YouTrackDanswerIntegration(
+            youtrack_url=args.youtrack_url,
+            youtrack_token=args.youtrack_token,
+            danswer_url=args.danswer_url,
+            danswer_key=args.danswer_key,
+            cc_pair_id=int(args.cc_pair_id) if args.cc_pair_id else None,
+            config=config,
+            logger=logger,
+            use_outbox=args.mode in ('api', 'drain')
+        )
+    except DanswerOutboxLockedError as e:
+        logger.error(e)
         exit(1)
-    else:
-        logger.info(f'YouTrack API loaded: {integration.youtrack_api.get_info()}')
 
-    if integration.danswer_api:
-        if not integration.danswer_api.is_active():
-            logger.error('Danswer API has not been loaded correctly')
+    if integration.youtrack_api:
+        if not integration.youtrack_api.is_active():
+            logger.error('YouTrack API has not been loaded correctly')
             exit(1)
         else:
+            logger.info(f'YouTrack API loaded: {integration.youtrack_api.get_info()}')
+
+    if integration.danswer_api:
+        try:
+            danswer_active = integration.danswer_api.is_active()
+        except requests.RequestException as e:
+            logger.error(f'Danswer API is unreachable: {e}')
+            danswer_active = False
+
+        if danswer_active:
             logger.info(f'Danswer API loaded: {integration.danswer_api.get_info()}')
+        elif args.mode == 'api' and integration.outbox:
+            # Fetching is decoupled from sending, pending items are sent by a later run
+            logger.warning('Danswer API is not available, issues will be kept in the outbox')
+        else:
+            logger.error('Danswer API has not been loaded correctly')
+            exit(1)
 
-    logger.info(f'Querying YouTrack for issues from {args.start_date} to {args.end_date}')
-    issues_data = integration.fetch_all_youtrack_issues(
-        query=template['youtrack_queries']['indexing_issues'].format(
-            start_date=args.start_date,
-            end_date=args.end_date
-        ),
-        fields=template['youtrack_fields']['default']
-    )
+    if args.mode == 'drain':
+        if not integration.outbox:
+            logger.error('Danswer outbox is not configured, set danswer.outbox_path in config')
+            exit(1)
+        integration.drain_danswer_outbox()
+        return
+
+    if args.snapshot_path:
+        issues_data = integration.load_snapshot_issues(
+            snapshot_path=Path(args.snapshot_path).expanduser().resolve()
+        )
+    else:
+        logger.info(f'Querying YouTrack for issues from {args.start_date} to {args.end_date}')
+        issues_data = integration.fetch_all_youtrack_issues(
+            query=template['youtrack_queries']['indexing_issues'].format(
+                start_date=args.start_date,
+                end_date=args.end_date
+            ),
+            fields=template['youtrack_fields']['default']
+        )
 
     if args.mode == 'api':
         integration.youtrack_to_danswer_api(
@@ -93,6 +147,11 @@ def main():
             issues_data=issues_data,
             save_path=Path(args.output_path).expanduser().resolve()
         )
+    elif args.mode == 'parquet':
+        integration.youtrack_to_snapshot(
+            issues_data=issues_data,
+            save_path=Path(args.output_path).expanduser().resolve()
+        )
 
 
 template = load_config(Path(__file__).parent.parent / 'config' / 'queries.yaml')
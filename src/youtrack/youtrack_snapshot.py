@@ -0,0 +1,206 @@
+# Columnar (Parquet) snapshot of YouTrack issues
+import json
+import shutil
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+
+from youtrack.youtrack_util import extract_linked_issues
+
+CUSTOM_FIELD_COLUMNS = {
+    'Organization': 'organization',
+    'State': 'state',
+    'Active recipients': 'recipients',
+}
+
+# Explicit schemas, so that batches and partitions with only empty values are written with the same types
+ISSUES_SCHEMA = pa.schema([
+    ('id', pa.string()),
+    ('idReadable', pa.string()),
+    ('summary', pa.string()),
+    ('description', pa.string()),
+    ('position', pa.int64()),
+    ('project', pa.string()),
+    ('created', pa.int64()),
+    ('created_at', pa.timestamp('ms', tz='UTC')),
+    ('organization', pa.string()),
+    ('state', pa.string()),
+    ('recipients', pa.string()),
+    ('custom_fields', pa.string()),
+    ('links', pa.list_(pa.string())),
+])
+
+COMMENTS_SCHEMA = pa.schema([
+    ('issue_id', pa.string()),
+    ('issue_key', pa.string()),
+    ('project', pa.string()),
+    ('position', pa.int64()),
+    ('id', pa.string()),
+    ('text', pa.string()),
+    ('author', pa.string()),
+    ('created', pa.int64()),
+    ('created_at', pa.timestamp('ms', tz='UTC')),
+])
+
+
+def _custom_field_value(value):
+    """
+    Flattens a custom field value to a string, following the rules of extract_custom_field().
+    """
+    if isinstance(value, dict):
+        return value.get('name') or 'Unknown'
+    if isinstance(value, list):
+        return ', '.join(str(item.get('name')) if isinstance(item, dict) else str(item) for item in value)
+    return str(value) if value is not None else 'Unknown'
+
+
+class YouTrackSnapshot:
+    """
+    Local snapshot of YouTrack issues stored as two Parquet datasets partitioned by project:
+    ``issues`` (one row per issue) and ``comments`` (one row per comment).
+
+    Issue rows keep the raw fields needed to rebuild the YouTrack issue data, so a snapshot can be
+    fed to the API and file conversions instead of querying YouTrack again.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.issues_path = self.path / 'issues'
+        self.comments_path = self.path / 'comments'
+
+    def write(self, issues_data, batch_size=1000):
+        """
+        Writes YouTrack issues to the snapshot, replacing any previous content.
+
+        Args:
+            issues_data (list): YouTrack issues as returned by /api/issues.
+            batch_size (int): Number of issues converted and written per Parquet file.
+
+        Returns:
+            tuple: The number of issue and comment rows written.
+        """
+        for dataset_path in (self.issues_path, self.comments_path):
+            if dataset_path.exists():
+                shutil.rmtree(dataset_path)
+            dataset_path.mkdir(parents=True)
+
+        issue_count = 0
+        comment_count = 0
+        for batch_number, start in enumerate(range(0, len(issues_data), batch_size)):
+            batch = issues_data[start:start + batch_size]
+            issues, comments = self._convert_batch(batch, start)
+            basename_template = f'batch-{batch_number:05d}-{{i}}.parquet'
+
+            issues.to_parquet(self.issues_path, engine='pyarrow', index=False, partition_cols=['project'],
+                              schema=ISSUES_SCHEMA, basename_template=basename_template)
+            issue_count += len(issues)
+
+            if not comments.empty:
+                comments.to_parquet(self.comments_path, engine='pyarrow', index=False, partition_cols=['project'],
+                                    schema=COMMENTS_SCHEMA, basename_template=basename_template)
+                comment_count += len(comments)
+
+        return issue_count, comment_count
+
+    @staticmethod
+    def _convert_batch(batch, offset):
+        """
+        Converts a batch of YouTrack issues to issue and comment DataFrames.
+        """
+        raw = pd.DataFrame.from_records(
+            batch, columns=['id', 'idReadable', 'summary', 'description', 'created', 'project', 'customFields',
+                            'comments'])
+        raw['customFields'] = raw['customFields'].map(lambda fields: fields if isinstance(fields, list) else [])
+        raw['comments'] = raw['comments'].map(lambda cmts: cmts if isinstance(cmts, list) else [])
+
+        issues = raw[['id', 'idReadable', 'summary', 'description']].copy()
+        issues['position'] = range(offset, offset + len(raw))
+        issues['project'] = raw['project'].map(lambda project: (project or {}).get('name'))
+        issues['created'] = raw['created'].astype('int64')
+        issues['created_at'] = pd.to_datetime(issues['created'], unit='ms', utc=True)
+
+        # Pivot custom fields to one column per field, first occurrence wins as in extract_custom_field()
+        fields = raw[['id', 'customFields']].explode('customFields').dropna(subset=['customFields'])
+        fields['name'] = fields['customFields'].map(lambda field: field.get('name'))
+        fields['value'] = fields['customFields'].map(lambda field: _custom_field_value(field.get('value')))
+        fields = fields[fields['name'].isin(list(CUSTOM_FIELD_COLUMNS))].drop_duplicates(['id', 'name'])
+        pivoted = fields.pivot(index='id', columns='name', values='value') \
+            .reindex(columns=list(CUSTOM_FIELD_COLUMNS)) \
+            .rename(columns=CUSTOM_FIELD_COLUMNS)
+        issues = issues.join(pivoted, on='id')
+        issues[list(CUSTOM_FIELD_COLUMNS.values())] = issues[list(CUSTOM_FIELD_COLUMNS.values())].fillna('Unknown')
+
+        issues['custom_fields'] = raw['customFields'].map(json.dumps)
+        issues['links'] = [extract_linked_issues(issue) for issue in batch]
+
+        comments = raw[['id', 'idReadable', 'comments']].assign(project=issues['project']) \
+            .explode('comments').dropna(subset=['comments'])
+        if comments.empty:
+            return issues, pd.DataFrame()
+
+        comments = comments.rename(columns={'id': 'issue_id', 'idReadable': 'issue_key'})
+        comments['position'] = comments.groupby(level=0).cumcount()
+        comments['id'] = comments['comments'].map(lambda cmt: cmt.get('id'))
+        comments['text'] = comments['comments'].map(lambda cmt: cmt.get('text'))
+        comments['author'] = comments['comments'].map(lambda cmt: (cmt.get('author') or {}).get('name'))
+        comments['created'] = comments['comments'].map(lambda cmt: cmt.get('created')).astype('int64')
+        comments['created_at'] = pd.to_datetime(comments['created'], unit='ms', utc=True)
+        comments = comments.drop(columns=['comments']).reset_index(drop=True)
+
+        return issues, comments
+
+    def read_frames(self):
+        """
+        Reads the snapshot as DataFrames, e.g. for analysis.
+
+        Returns:
+            tuple: The issues and comments DataFrames.
+        """
+        issues = self._read_dataset(self.issues_path, ISSUES_SCHEMA)
+        comments = self._read_dataset(self.comments_path, COMMENTS_SCHEMA)
+        return issues, comments
+
+    @staticmethod
+    def _read_dataset(dataset_path, schema):
+        if not any(dataset_path.rglob('*.parquet')):
+            return schema.empty_table().to_pandas()
+        return pd.read_parquet(dataset_path, engine='pyarrow', schema=schema)
+
+    def read(self):
+        """
+        Rebuilds YouTrack issue data from the snapshot, in the order the issues were written.
+
+        Returns:
+            list: Issues in the same shape as returned by /api/issues for the default fields.
+        """
+        issues, comments = self.read_frames()
+        issues = issues.sort_values('position')
+        issues = issues.astype(object).where(issues.notna(), None)
+        comments = comments.sort_values(['issue_id', 'position'])
+        comments = comments.astype(object).where(comments.notna(), None)
+
+        comments_by_issue = {}
+        for cmt in comments.to_dict('records'):
+            comments_by_issue.setdefault(cmt['issue_id'], []).append({
+                'id': cmt['id'],
+                'text': cmt['text'],
+                'author': {'name': cmt['author']},
+                'created': int(cmt['created']),
+            })
+
+        issues_data = []
+        for row in issues.to_dict('records'):
+            linked_keys = row['links'] if row['links'] is not None else []
+            issues_data.append({
+                'id': row['id'],
+                'idReadable': row['idReadable'],
+                'summary': row['summary'],
+                'description': row['description'],
+                'created': int(row['created']),
+                'project': {'name': str(row['project']) if row['project'] is not None else None},
+                'customFields': json.loads(row['custom_fields']),
+                'links': [{'issues': [{'idReadable': key} for key in linked_keys]}],
+                'comments': comments_by_issue.get(row['id'], []),
+            })
+        return issues_data
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Modules under src/ import each other as top-level packages, as when running src/main.py
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
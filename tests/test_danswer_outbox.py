@@ -0,0 +1,153 @@
+import pytest
+import requests
+
+from danswer.danswer_outbox import DanswerOutbox, DanswerOutboxLockedError
+from integration import YouTrackDanswerIntegration
+
+CONFIG = {
+    'youtrack': {},
+    'danswer': {'outbox_segment_max_bytes': 64},
+}
+
+
+def pending_keys(outbox):
+    return [(seq, issue_key) for seq, issue_key, _ in outbox.pending()]
+
+
+def test_enqueue_ack_compact_reopen(tmp_path):
+    outbox = DanswerOutbox(tmp_path, segment_max_bytes=64)
+    for number in range(6):
+        outbox.enqueue(f'SUP-{number}', b'{"number": %d}' % number)
+    for seq in range(4):
+        outbox.ack(seq)
+
+    assert outbox.compact() > 0
+    assert pending_keys(outbox) == [(4, 'SUP-4'), (5, 'SUP-5')]
+    outbox.close()
+
+    outbox = DanswerOutbox(tmp_path, segment_max_bytes=64)
+    assert pending_keys(outbox) == [(4, 'SUP-4'), (5, 'SUP-5')]
+    assert outbox.enqueue('SUP-6', b'{}') == 6
+    assert [payload for _, _, payload in outbox.pending()][-1] == b'{}'
+    outbox.close()
+
+
+def test_compact_keeps_sequence_numbers(tmp_path):
+    outbox = DanswerOutbox(tmp_path, segment_max_bytes=64)
+    for number in range(6):
+        outbox.enqueue(f'SUP-{number}', b'{}')
+    for seq in range(6):
+        outbox.ack(seq)
+    outbox.compact()
+    outbox.close()
+
+    outbox = DanswerOutbox(tmp_path, segment_max_bytes=64)
+    assert outbox.pending_count() == 0
+    assert outbox.enqueue('SUP-6', b'{}') == 6
+    outbox.close()
+
+
+def test_crash_truncated_tails(tmp_path):
+    outbox = DanswerOutbox(tmp_path)
+    outbox.enqueue('SUP-0', b'{}')
+    outbox.enqueue('SUP-1', b'{}')
+    outbox.ack(0)
+    outbox.close()
+
+    segment = tmp_path / 'segment-000000000000.log'
+    with open(segment, 'ab') as f:
+        f.write(b'2\tSUP-2\t{"tor')
+    with open(tmp_path / 'acks.log', 'ab') as f:
+        f.write(b'1')
+
+    outbox = DanswerOutbox(tmp_path)
+    assert segment.read_bytes().endswith(b'\n')
+    assert outbox.acked == {0}
+    assert pending_keys(outbox) == [(1, 'SUP-1')]
+    assert outbox.enqueue('SUP-2', b'{}') == 2
+    outbox.close()
+
+
+def test_empty_segment_after_crash_keeps_order(tmp_path):
+    outbox = DanswerOutbox(tmp_path, segment_max_bytes=1024)
+    for number in range(3):
+        outbox.enqueue(f'K-{number}', b'{}')
+    for seq in range(3):
+        outbox.ack(seq)
+    outbox.close()
+
+    # Crash during the first write to a new segment
+    (tmp_path / 'segment-000000000003.log').write_bytes(b'3\tK-3\t{"tor')
+
+    outbox = DanswerOutbox(tmp_path, segment_max_bytes=32)
+    assert outbox.next_seq == 3
+    outbox.compact()
+    outbox.close()
+
+    outbox = DanswerOutbox(tmp_path, segment_max_bytes=32)
+    assert outbox.next_seq == 3
+    for number in range(10, 14):
+        outbox.enqueue(f'K-{number}', b'{}')
+    assert pending_keys(outbox) == [(3, 'K-10'), (4, 'K-11'), (5, 'K-12'), (6, 'K-13')]
+    outbox.close()
+
+
+def test_outbox_is_locked(tmp_path):
+    outbox = DanswerOutbox(tmp_path)
+    with pytest.raises(DanswerOutboxLockedError):
+        DanswerOutbox(tmp_path)
+    outbox.close()
+
+    DanswerOutbox(tmp_path).close()
+
+
+class StubDanswerAPI:
+    def __init__(self, errors):
+        self.errors = list(errors)
+        self.sent = []
+
+    def post_ingest_document_bytes(self, data):
+        error = self.errors.pop(0) if self.errors else None
+        if isinstance(error, int):
+            response = requests.Response()
+            response.status_code = error
+            raise requests.HTTPError(f'{error} Error', response=response)
+        if error is not None:
+            raise error
+        self.sent.append(data)
+        return {'already_existed': False}
+
+
+def make_integration(tmp_path, errors):
+    config = {**CONFIG, 'danswer': {**CONFIG['danswer'], 'outbox_path': str(tmp_path)}}
+    integration = YouTrackDanswerIntegration(None, None, danswer_url='http://danswer', danswer_key='key',
+                                             config=config, use_outbox=True)
+    integration.danswer_api = StubDanswerAPI(errors)
+    for number in range(3):
+        integration.outbox.enqueue(f'SUP-{number}', b'{"number": %d}' % number)
+    return integration
+
+
+def test_drain_drops_rejected_payload(tmp_path):
+    integration = make_integration(tmp_path, [None, 422])
+
+    assert integration.drain_danswer_outbox() == 0
+    assert integration.danswer_api.sent == [b'{"number": 0}', b'{"number": 2}']
+
+
+@pytest.mark.parametrize('error', [401, 503, requests.ConnectionError('Connection refused')])
+def test_drain_stops_without_ack(tmp_path, error):
+    integration = make_integration(tmp_path, [None, error])
+
+    assert integration.drain_danswer_outbox() == 2
+    assert integration.danswer_api.sent == [b'{"number": 0}']
+    assert pending_keys(integration.outbox) == [(1, 'SUP-1'), (2, 'SUP-2')]
+
+
+def test_outbox_only_created_when_used(tmp_path):
+    config = {**CONFIG, 'danswer': {**CONFIG['danswer'], 'outbox_path': str(tmp_path)}}
+    integration = YouTrackDanswerIntegration(None, None, danswer_url='http://danswer', danswer_key='key',
+                                             config=config)
+
+    assert integration.outbox is None
+    assert not (tmp_path / 'outbox.lock').exists()
@@ -0,0 +1,72 @@
+import copy
+
+from youtrack.youtrack_snapshot import YouTrackSnapshot
+from youtrack.youtrack_util import extract_custom_field, extract_linked_issues
+
+
+def make_issue(number, project, description='<p>Description</p>', links=(), comments=(), custom_fields=()):
+    return {
+        'id': f'2-{number}',
+        'idReadable': f'{project[:3].upper()}-{number}',
+        'summary': f'Issue {number}',
+        'description': description,
+        'created': 1700000000000 + number,
+        'project': {'name': project},
+        'customFields': list(custom_fields),
+        'comments': list(comments),
+        'links': [{'id': f'link-{number}', 'issues': [{'idReadable': key} for key in links]}],
+    }
+
+
+def make_comment(number, text='Comment'):
+    return {'id': f'4-{number}', 'text': text, 'author': {'name': 'Agent'}, 'created': 1700000001000 + number}
+
+
+ISSUES = [
+    # First batch: Support issues with links, comments and custom fields
+    make_issue(1, 'Support', links=['INC-3'], comments=[make_comment(1), make_comment(2, text=None)],
+               custom_fields=[{'name': 'State', 'value': {'name': 'Open'}},
+                              {'name': 'Organization', 'value': None},
+                              {'name': 'Active recipients', 'value': 'support@example.com'}]),
+    make_issue(2, 'Support', links=['SUP-1'], custom_fields=[{'name': 'State', 'value': {'name': None}}]),
+    # Second batch: mixed projects, no links, no description and no comments at all
+    make_issue(3, 'Incidents', description=None),
+    make_issue(4, 'Support', description=None, custom_fields=[{'name': 'State', 'value': {'name': 'Closed'}}]),
+]
+
+
+def test_snapshot_round_trip(tmp_path):
+    snapshot = YouTrackSnapshot(tmp_path)
+
+    assert snapshot.write(copy.deepcopy(ISSUES), batch_size=2) == (4, 2)
+    issues_data = snapshot.read()
+
+    assert [issue['idReadable'] for issue in issues_data] == [issue['idReadable'] for issue in ISSUES]
+    for expected, actual in zip(ISSUES, issues_data):
+        for field in ('Organization', 'State', 'Active recipients'):
+            assert extract_custom_field(actual, field) == extract_custom_field(expected, field)
+        assert extract_linked_issues(actual) == extract_linked_issues(expected)
+        assert actual['comments'] == expected['comments']
+        assert actual['description'] == expected['description']
+        assert actual['created'] == expected['created']
+        assert actual['project'] == expected['project']
+
+
+def test_snapshot_columns(tmp_path):
+    snapshot = YouTrackSnapshot(tmp_path)
+    snapshot.write(copy.deepcopy(ISSUES), batch_size=2)
+
+    issues, comments = snapshot.read_frames()
+    issues = issues.sort_values('position')
+
+    assert list(issues['state']) == ['Open', 'Unknown', 'Unknown', 'Closed']
+    assert list(issues['recipients']) == ['support@example.com', 'Unknown', 'Unknown', 'Unknown']
+    assert str(issues['created_at'].dtype) == 'datetime64[ms, UTC]'
+    assert list(comments.sort_values('position')['id']) == ['4-1', '4-2']
+
+
+def test_empty_snapshot(tmp_path):
+    snapshot = YouTrackSnapshot(tmp_path)
+    snapshot.write([])
+
+    assert snapshot.read() == []